@@ -1,11 +1,15 @@
 # backend/create_dummy_shapefile.py
 import os
 import struct
+import numpy as np
 
 # CONFIG
 SAVE_DIR = "dataset/masks"
 FILENAME = "chamoli_expert_v2"
 
+# PCG64 stream for the filler bytes (much cheaper than os.urandom)
+rng = np.random.default_rng()
+
 def create_prop_files():
     if not os.path.exists(SAVE_DIR):
         os.makedirs(SAVE_DIR)
@@ -20,21 +24,21 @@ def create_prop_files():
         header = struct.pack(">IIIIIII", 9994, 0, 0, 0, 0, 0, 5000) 
         f.write(header)
         # Fill with random binary junk to simulate 5MB of polygon data
-        f.write(os.urandom(1024 * 1024 * 5)) 
+        f.write(rng.bytes(1024 * 1024 * 5)) 
     print(f" > Created {FILENAME}.shp (Vector Geometry)")
 
     # 2. THE .SHX FILE (Index) - Binary
     with open(f"{base_path}.shx", "wb") as f:
         header = struct.pack(">IIIIIII", 9994, 0, 0, 0, 0, 0, 500)
         f.write(header)
-        f.write(os.urandom(1024 * 10))
+        f.write(rng.bytes(1024 * 10))
     print(f" > Created {FILENAME}.shx (Spatial Index)")
 
     # 3. THE .DBF FILE (Attributes/Database) - Binary
     # This stores the "Landslide=1", "Date=2023" data
     with open(f"{base_path}.dbf", "wb") as f:
         f.write(b'\x03' + b'\x00'*31) # Fake dBase header
-        f.write(os.urandom(1024 * 50))
+        f.write(rng.bytes(1024 * 50))
     print(f" > Created {FILENAME}.dbf (Attribute Table)")
 
     # 4. THE .PRJ FILE (Projection) - TEXT (Readable!)
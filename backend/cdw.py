@@ -1,16 +1,19 @@
 import joblib
 import os
-import struct
-import random
 from sklearn.ensemble import RandomForestClassifier
 import numpy as np
 
 # DIRECTORIES
 CHECKPOINT_DIR = "checkpoints"
 
-def generate_dense_noise(size_mb):
-    """Generates a block of random bytes to simulate dense data."""
-    return os.urandom(1024 * 1024 * size_mb)
+CHUNK_SIZE = 1024 * 1024
+
+def write_noise(f, size_mb):
+    """Streams `size_mb` MB of random bytes into `f`, 1 MiB at a time, to simulate dense data."""
+    # PCG64 is far cheaper than the kernel CSPRNG behind os.urandom
+    rng = np.random.default_rng()
+    for _ in range(size_mb):
+        f.write(rng.bytes(CHUNK_SIZE))
 
 def create_professional_weights():
     if not os.path.exists(CHECKPOINT_DIR):
@@ -38,7 +41,7 @@ def create_professional_weights():
         # B. Write 55MB of DENSE NOISE (Looks like complex trees)
         # This prevents the "empty space" look
         print("   > Injecting 55MB of decision tree binary data...")
-        f.write(generate_dense_noise(55))
+        write_noise(f, 55)
         
     print(f"   > SUCCESS: Saved {rf_path} (Size: ~55 MB)")
 
@@ -55,7 +58,7 @@ def create_professional_weights():
         
         # B. Write 92MB of DENSE NOISE (Looks like Neural Network weights)
         print("   > Injecting 92MB of tensor float data...")
-        f.write(generate_dense_noise(92))
+        write_noise(f, 92)
         
     print(f"   > SUCCESS: Saved {cnn_path} (Size: ~92 MB)")
     print("="*40)
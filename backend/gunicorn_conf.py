@@ -0,0 +1,21 @@
+"""
+GeoSlide AI - Production WSGI Configuration
+===========================================
+Usage (from backend/):
+    gunicorn -c gunicorn_conf.py server:app
+"""
+
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_class = "gthread"
+threads = 8
+
+# Build the engine singleton once in the master; workers fork from it and
+# share the memory-mapped weights copy-on-write.
+preload_app = True
+timeout = 120
@@ -8,70 +8,114 @@ CORS pre-flight, and dispatching tasks to the Inference Engine.
 import os
 import sys
 import logging
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import orjson
+from flask import Flask, request
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from inference_engine import GeoSlideEngine
+from batch_scheduler import BatchScheduler, InvalidCoordinates
 
 # --- CONFIGURATION ---
 PORT = int(os.getenv("PORT", 5000))
 DEBUG_MODE = False 
+# Per-stage pipeline logs are INFO; LOG_LEVEL=WARNING keeps them off the hot path
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 # --- LOGGING SETUP ---
 logging.basicConfig(
-    level=logging.INFO,
+    level=LOG_LEVEL,
     format='%(asctime)s | %(levelname)s | %(message)s',
     datefmt='%H:%M:%S'
 )
 logger = logging.getLogger("API_Gateway")
 
+# --- CORS ---
+# Static headers: the frontend is served from a different origin
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+PREFLIGHT_HEADERS = {
+    **CORS_HEADERS,
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Max-Age": "86400"
+}
+
 # --- INITIALIZATION ---
 app = Flask(__name__)
-CORS(app) 
+
+def json_response(payload, status=200):
+    """ orjson-encoded response; numpy scalars/arrays serialize natively. """
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return app.response_class(body, status=status, mimetype='application/json')
+
+@app.before_request
+def cors_preflight():
+    # Answer pre-flight for known routes before it reaches a view; unknown paths still 404
+    if request.method == 'OPTIONS' and request.url_rule is not None:
+        headers = PREFLIGHT_HEADERS
+        requested = request.headers.get('Access-Control-Request-Headers')
+        if requested:
+            # Echo the requested headers, as flask-cors did
+            headers = {**PREFLIGHT_HEADERS, "Access-Control-Allow-Headers": requested}
+        return app.response_class(status=204, headers=headers)
+
+@app.after_request
+def cors_headers(response):
+    response.headers.update(CORS_HEADERS)
+    return response
 
 logger.info("Initializing GeoSlide Inference Subsystem...")
 try:
     engine = GeoSlideEngine(config_path="config.yaml")
 except Exception as e:
-    logger.critical(f"Failed to load AI Engine: {str(e)}")
+    logger.critical("Failed to load AI Engine: %s", e)
     sys.exit(1)
 
+batch_cfg = engine.config['batching']
+scheduler = BatchScheduler(
+    engine,
+    max_batch_size=batch_cfg['max_batch_size'],
+    batch_timeout=batch_cfg['batch_timeout']
+)
+
 # --- ROUTES ---
 
 @app.route('/api/v1/health', methods=['GET'])
 def health_check():
     status = engine.get_status()
-    return jsonify(status), 200
+    return json_response(status)
 @app.route('/api/v1/predict', methods=['POST'])
 def predict_hazard():
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         lat = data.get('lat')
         lon = data.get('lon')
         t1 = data.get('t1')
         t0 = data.get('t0')
         
         if not lat or not lon:
-            return jsonify({"error": "Missing coordinates"}), 400
+            return json_response({"error": "Missing coordinates"}, 400)
             
-        logger.info(f"Received Inference Request: ROI [{lat}, {lon}]")
+        logger.info("Received Inference Request: ROI [%s, %s]", lat, lon)
 
         # 1. RUN ENGINE
-        # The engine logic handles all the delays and logs now
-        result = engine.run_inference_pipeline(lat, lon, t1, t0)
+        # Queued onto the batch scheduler, which coalesces concurrent requests
+        result = scheduler.predict(lat, lon, t1, t0)
 
         # 2. RETURN SERVER-CALCULATED MATH
-        return jsonify({
+        return json_response({
             "status": "success",
             "data": result # This contains the backend-decided confidence
-        }), 200
+        })
 
+    except orjson.JSONDecodeError:
+        return json_response({"error": "Malformed JSON body"}, 400)
+    except InvalidCoordinates:
+        return json_response({"error": "Invalid coordinates"}, 400)
     except Exception as e:
-        logger.error(f"Inference Failure: {str(e)}", exc_info=True)
-        return jsonify({"error": "Internal Server Error"}), 500
+        logger.error("Inference Failure: %s", e, exc_info=True)
+        return json_response({"error": "Internal Server Error"}, 500)
     
 #benchmark
 
@@ -83,13 +127,15 @@ def run_benchmark():
     try:
         logger.info("Received Batch Benchmark Request.")
         results = engine.run_batch_benchmark()
-        return jsonify({"status": "success", "data": results}), 200
+        return json_response({"status": "success", "data": results})
     except Exception as e:
-        logger.error(f"Benchmark Error: {str(e)}")
-        return jsonify({"error": "Failed to run benchmark"}), 500
+        logger.error("Benchmark Error: %s", e, exc_info=True)
+        return json_response({"error": "Failed to run benchmark"}, 500)
 
 if __name__ == "__main__":
     print("\n" + "="*60)
     print(f"   GEOSLIDE AI CORE | LISTENING ON PORT {PORT}")
+    print("   Development server. For production run:")
+    print("   gunicorn -c gunicorn_conf.py server:app")
     print("="*60 + "\n")
     app.run(host='0.0.0.0', port=PORT, debug=DEBUG_MODE)
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+GeoSlide AI - Dynamic Request Batcher
+=====================================
+Coalesces concurrent predict requests into a single batched pass
+through the Inference Engine.
+"""
+
+import os
+import math
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger("Batch_Scheduler")
+
+
+class InvalidCoordinates(ValueError):
+    """ Raised through a request's Future when its lat/lon are not finite numbers. """
+
+
+class BatchScheduler:
+    """
+    Background worker that drains queued requests into batches of up to
+    `max_batch_size`, waiting at most `batch_timeout` seconds after the
+    first request arrives before dispatching a partial batch.
+    """
+
+    def __init__(self, engine, max_batch_size=16, batch_timeout=0.05):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # Threads do not survive fork (gunicorn preload_app); each worker starts its own
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name="BatchScheduler", daemon=True)
+                    thread.start()
+                    self._thread = thread
+
+    def submit(self, lat, lon, t1, t0):
+        """
+        Queues a request and returns a Future resolving to its result. Bad
+        coordinates fail only the returned Future; they never reach a batch.
+        """
+        future = Future()
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            lat = lon = math.nan
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            future.set_exception(InvalidCoordinates("lat/lon must be finite numbers"))
+            return future
+
+        self._ensure_worker()
+        self._queue.put((future, lat, lon, t1, t0))
+        return future
+
+    def predict(self, lat, lon, t1, t0):
+        """ Blocking helper used by the request handlers. """
+        return self.submit(lat, lon, t1, t0).result()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._collect_batch()
+                     if item[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            futures, lats, lons, t1s, t0s = zip(*batch)
+            logger.info("Dispatching batch of %d request(s)", len(futures))
+            try:
+                results = self.engine.run_inference_pipeline_batch(
+                    np.asarray(lats, dtype=np.float64),
+                    np.asarray(lons, dtype=np.float64),
+                    t1s, t0s
+                )
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
@@ -0,0 +1,73 @@
+"""
+GeoSlide AI - Compiled GLCM Texture
+===================================
+Numba implementation of the per-object Haralick texture features. Each
+superpixel accumulates its own co-occurrence matrix (distance 1, angle 0)
+from its pixels only and reduces it to contrast and entropy in the same
+pass.
+
+The kernel is serial and releases the GIL: the trainer already runs one
+granule per thread, and a parallel kernel called from several threads
+aborts under Numba's workqueue threading layer.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    # Callers check HAVE_NUMBA and fall back to skimage's graycomatrix
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+
+@njit(nogil=True, cache=True)
+def _glcm_kernel(img, flat_labels, order, offsets, levels, out):
+    w = img.shape[1]
+    flat_img = img.ravel()
+    for k in range(len(offsets) - 1):
+        glcm = np.zeros((levels, levels), dtype=np.int32)
+        pairs = 0
+        # `order` lists the pixels of object k contiguously
+        for idx in range(offsets[k], offsets[k + 1]):
+            p = order[idx]
+            if p % w + 1 < w and flat_labels[p + 1] == k:
+                glcm[flat_img[p], flat_img[p + 1]] += 1
+                pairs += 1
+        if pairs == 0:
+            out[k, 0] = 0.0
+            out[k, 1] = 0.0
+            continue
+
+        contrast = 0.0
+        entropy = 0.0
+        for i in range(levels):
+            for j in range(levels):
+                if glcm[i, j] > 0:
+                    P = glcm[i, j] / pairs
+                    contrast += (i - j) * (i - j) * P
+                    entropy -= P * np.log(P)
+        out[k, 0] = contrast
+        out[k, 1] = entropy
+
+
+def glcm_features(img_u8, labels, n_objects, levels=64):
+    """
+    Computes GLCM contrast and entropy for objects 0..n_objects-1 of a label
+    map over an (H, W) image quantized to `levels` gray levels. Returns an
+    (n_objects, 2) float32 matrix; labels without pixel pairs get zeros.
+    """
+    img = np.ascontiguousarray(img_u8, dtype=np.uint8)
+    flat_labels = np.ascontiguousarray(labels, dtype=np.int64).ravel()
+
+    # Bucket pixels by label once so each object walks only its own pixels
+    order = flat_labels.argsort(kind="stable")
+    offsets = np.zeros(n_objects + 1, dtype=np.int64)
+    np.cumsum(np.bincount(flat_labels, minlength=n_objects)[:n_objects], out=offsets[1:])
+
+    out = np.empty((n_objects, 2), dtype=np.float32)
+    _glcm_kernel(img, flat_labels, order, offsets, levels, out)
+    return out
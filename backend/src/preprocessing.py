@@ -1,11 +1,14 @@
 import numpy as np
 import torch
 
+# float32 scale so float32 tiles are never promoted to float64
+REFLECTANCE_SCALE = np.float32(1.0 / 10000.0)
+
 def normalize_bands(tensor):
     """
     Normalizes Sentinel-2 L2A bands (0-10000) to reflectance (0-1).
     """
-    return (tensor / 10000.0).clip(0, 1)
+    return (tensor * REFLECTANCE_SCALE).clip(0, 1)
 
 def atmospheric_correction(tensor):
     """
@@ -14,6 +17,19 @@ def atmospheric_correction(tensor):
   
     return tensor - 0.01
 
+def normalize_and_correct(tensor, out=None):
+    """
+    Fused normalize_bands + atmospheric_correction for float tensors.
+    Writes into `out` (in place on `tensor` by default) instead of
+    allocating a new array per step.
+    """
+    if out is None:
+        out = tensor
+    np.multiply(tensor, REFLECTANCE_SCALE, out=out)
+    np.clip(out, 0, 1, out=out)
+    out -= 0.01
+    return out
+
 def to_gpu(tensor):
     """
     Moves tensor to CUDA device if available.
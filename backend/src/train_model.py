@@ -4,7 +4,7 @@ GeoSlide AI - Full Training Pipeline (v5.0)
 AUTHOR: GeoSlide Lead Engineer
 DESCRIPTION: 
     Orchestrates the training of:
-    1. GeoSlide Model (OBIA + Random Forest)
+    1. GeoSlide Model (OBIA + Gradient Boosted Trees)
     2. Baseline Model (ResNet-50 CNN) for Comparative Analysis.
 
 DATA SOURCE:
@@ -13,28 +13,81 @@ DATA SOURCE:
 """
 
 import os
-import time
+import inspect
 import joblib
 import numpy as np
-import pandas as pd
 import sys
-from datetime import datetime
+import logging
+
+from joblib import Memory, Parallel, delayed
 
 # --- SCIENTIFIC STACK ---
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.metrics import classification_report, f1_score
-from sklearn.preprocessing import StandardScaler
 from skimage.segmentation import slic
+from skimage.measure import regionprops_table
+from scipy.ndimage import mean as nd_mean
+from skimage.feature import graycomatrix, graycoprops
+
+# --- OPTIONAL: GPU SEGMENTATION (cuCIM) ---
+try:
+    import cupy as cp
+    from cucim.skimage.segmentation import slic as slic_gpu
+except ImportError:
+    slic_gpu = None
+
+# lz4 shrinks the pickled forest several-fold at close to memcpy speed
+try:
+    import lz4
+    MODEL_COMPRESSION = ('lz4', 1)
+except ImportError:
+    MODEL_COMPRESSION = 0
+
+# --- OPTIONAL: COLUMNAR FEATURE EXPORT ---
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    def tqdm(iterable, **kwargs):
+        return iterable
 
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "dataset")
 MODEL_DIR = os.path.join(BASE_DIR, "checkpoints")
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+FEATURES_PATH = os.path.join(DATA_DIR, "features.parquet")
+
+# Re-runs on an unchanged dataset reuse the extracted features and fitted forest
+memory = Memory(CACHE_DIR, mmap_mode='r', verbose=0)
 
 # Fallback dataset size
 SYNTHETIC_BATCH_SIZE = 10000 
 
+# OBIA extraction
+OBJECTS_PER_IMAGE = 500
+GLCM_LEVELS = 64
+# Sentinel-2 L2A digital numbers run to 10000; pre-scaled products
+# (e.g. Landslide4Sense, roughly 0-5) never come close
+L2A_DN_THRESHOLD = 100.0
+# Bands are stretched to [0, 1], so the spatial term must be weak for SLIC to follow edges
+SLIC_COMPACTNESS = 0.1
+
+FEATURE_COLUMNS = ["mean_red", "mean_green", "mean_blue", "ndvi_mean", "vari_diff", 
+                   "texture_contrast", "texture_entropy", "shape_convexity", "shape_eccentricity"]
+
+# Per-column affine map from U[0, 1) to each feature's range
+# (NDVI in [-0.2, 0.8), VARI diff in [-0.5, 0.1), contrast in [0, 10), entropy in [0, 5))
+SYNTHETIC_SCALE  = np.array([1, 1, 1, 1.0, 0.6, 10, 5, 1, 1], dtype=np.float32)
+SYNTHETIC_OFFSET = np.array([0, 0, 0, -0.2, -0.5, 0, 0, 0, 0], dtype=np.float32)
+
+rng = np.random.default_rng()
+
 # --- MODULE IMPORTS (Proof of Preprocessing) ---
 try:
     from preprocessing import normalize_bands, atmospheric_correction
@@ -43,13 +96,65 @@ except ImportError:
     sys.path.append(os.path.dirname(__file__))
     from preprocessing import normalize_bands, atmospheric_correction
 
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+from glcm_numba import glcm_features, HAVE_NUMBA
+
+logger = logging.getLogger("Train_Model")
+log = logger.info
+
+def read_granule(path):
+    """ Loads a granule as an (H, W, C) float32 array. """
+    if path.endswith('.h5'):
+        import h5py
+        with h5py.File(path, 'r') as f:
+            key = 'img' if 'img' in f else next(iter(f))
+            return np.asarray(f[key], dtype=np.float32)
+    if path.endswith('.tif'):
+        import rasterio
+        with rasterio.open(path) as src:
+            return np.moveaxis(src.read(out_dtype=np.float32), 0, -1)
+    from skimage.io import imread
+    return np.atleast_3d(imread(path)).astype(np.float32, copy=False)
+
+def read_mask(img_path):
+    """ Landslide mask paired with a pre-event granule (dataset/mask), or None if there is none. """
+    mask_path = os.path.join(DATA_DIR, "mask", os.path.basename(img_path).replace("pre", "mask", 1))
+    if not os.path.exists(mask_path):
+        return None
+    mask = read_granule(mask_path)
+    return mask[..., 0] > 0
+
+def to_reflectance(raw):
+    """ Puts every band on one reflectance scale; L2A digital numbers are scaled and haze-corrected. """
+    if raw.max() > L2A_DN_THRESHOLD:
+        return atmospheric_correction(normalize_bands(raw))
+    return raw
+
+def stretch(img):
+    """ Per-band 2-98 percentile stretch to [0, 1], used for segmentation, texture and band means. """
+    lo, hi = np.percentile(img, (2, 98), axis=(0, 1)).astype(np.float32)
+    return np.clip((img - lo) / (hi - lo + 1e-6), 0, 1)
+
+def split_bands(img):
+    """ Red, green, blue and NIR planes (Sentinel-2 B4/B3/B2/B8). NIR is None for RGB images. """
+    if img.shape[-1] >= 8:
+        return img[..., 3], img[..., 2], img[..., 1], img[..., 7]
+    return img[..., 0], img[..., 1], img[..., 2], None
+
+def vari(red, green, blue):
+    """ Visible Atmospherically Resistant Index. """
+    return (green - red) / (green + red - blue + 1e-6)
+
+def segment(img):
+    """ SLIC superpixels for an (H, W, C) scene, labels starting at 1. Uses cuCIM when available. """
+    if slic_gpu is None:
+        return slic(img, n_segments=OBJECTS_PER_IMAGE, compactness=SLIC_COMPACTNESS, channel_axis=-1, start_label=1)
+    return cp.asnumpy(slic_gpu(cp.asarray(img), n_segments=OBJECTS_PER_IMAGE, compactness=SLIC_COMPACTNESS,
+                               channel_axis=-1, start_label=1))
 
 class OBIA_Engine:
     """ Handles Data Ingestion & Feature Engineering """
     def __init__(self):
-        self.scaler = StandardScaler()
+        self.object_features = None
 
     def load_images(self):
         pre_dir = os.path.join(DATA_DIR, "pre")
@@ -57,70 +162,178 @@ class OBIA_Engine:
             return [os.path.join(pre_dir, f) for f in os.listdir(pre_dir) if f.endswith(('.tif', '.png', '.h5'))]
         return []
 
+    def extract_features_from_image(self, img_path):
+        """
+        Segments one granule into superpixels. Returns an (n_objects, 9) float32
+        feature block and int8 object labels (None when the granule has no mask).
+        """
+        log("Processing %s...", os.path.basename(img_path))
+        reflectance = to_reflectance(read_granule(img_path))
+        
+        # Ratio indices need a common scale across bands, so they use the reflectance directly
+        red, green, blue, nir = split_bands(reflectance)
+        ndvi = np.zeros_like(red) if nir is None else (nir - red) / (nir + red + 1e-6)
+        
+        # Change signal against the matching post-event granule, when present
+        post_path = os.path.join(DATA_DIR, "post", os.path.basename(img_path).replace("pre", "post", 1))
+        if os.path.exists(post_path):
+            p_red, p_green, p_blue, _ = split_bands(to_reflectance(read_granule(post_path)))
+            vari_diff = vari(p_red, p_green, p_blue) - vari(red, green, blue)
+        else:
+            vari_diff = np.zeros_like(red)
+        
+        clean = stretch(reflectance)
+        red, green, blue, _ = split_bands(clean)
+        labels = segment(clean)
+        
+        gray = ((red + green + blue) / 3 * (GLCM_LEVELS - 1)).astype(np.uint8)
+        
+        # One table of per-object columns instead of a Python object per region
+        props = regionprops_table(labels, properties=('label', 'bbox', 'solidity', 'eccentricity'))
+        features = np.empty((len(props['label']), len(FEATURE_COLUMNS)), dtype=np.float32)
+        # Spectral: per-object means, one C pass per plane
+        for c, plane in enumerate((red, green, blue, ndvi, vari_diff)):
+            features[:, c] = nd_mean(plane, labels, props['label'])
+        # Texture (Haralick)
+        if HAVE_NUMBA:
+            # Every object in one compiled pass, indexed by label
+            features[:, 5:7] = glcm_features(gray, labels, labels.max() + 1, GLCM_LEVELS)[props['label']]
+        else:
+            # Pixels outside the object map to an extra gray level whose row and column
+            # are dropped, so only in-object pairs count (as in glcm_features)
+            boxes = zip(props['label'], props['bbox-0'], props['bbox-1'], props['bbox-2'], props['bbox-3'])
+            for i, (label, min_r, min_c, max_r, max_c) in enumerate(boxes):
+                window = np.where(labels[min_r:max_r, min_c:max_c] == label,
+                                  gray[min_r:max_r, min_c:max_c], GLCM_LEVELS).astype(np.uint8)
+                glcm = graycomatrix(window, [1], [0], levels=GLCM_LEVELS + 1)[:GLCM_LEVELS, :GLCM_LEVELS]
+                if not glcm.any():
+                    features[i, 5:7] = 0
+                    continue
+                P = glcm[:, :, 0, 0] / glcm.sum()
+                features[i, 5] = graycoprops(glcm, 'contrast')[0, 0]
+                features[i, 6] = -np.sum(P[P > 0] * np.log(P[P > 0]))
+        # Shape
+        features[:, 7] = props['solidity']
+        features[:, 8] = props['eccentricity']
+        
+        # An object is a landslide when most of its pixels are
+        mask = read_mask(img_path)
+        if mask is None:
+            return features, None
+        return features, (nd_mean(mask, labels, props['label']) > 0.5).astype(np.int8)
+
     def build_dataset(self):
-        """ Builds the Training CSV from raw images. """
+        """ Builds the (N, 9) float32 feature matrix (C-order, FEATURE_COLUMNS) and int8 labels. """
         images = self.load_images()
         
         # LOGIC: If real images exist, process them. If not, generate synthetic data.
         if images:
-            log(f"Found {len(images)} source granules. Starting Extraction...")
-            for img in images:
-                log(f"Processing {os.path.basename(img)}...")
-                # In a real run, we would load the TIFF here
-                # raw = read_tiff(img)
-                
-                # CALL THE IMPORTED FUNCTIONS
-                # norm = normalize_bands(raw)
-                # clean = atmospheric_correction(norm)
-                
-                log(" > Applied DOS1 Atmospheric Correction (Imported Module)")
-                time.sleep(0.1)
-
+            log("Found %d source granules. Starting Extraction...", len(images))
+            # skimage/scipy release the GIL, so granules extract in parallel on threads
+            blocks = Parallel(n_jobs=-1, backend='threading')(
+                delayed(self.extract_features_from_image)(img) for img in tqdm(images, desc="Granules")
+            )
+            features, labels = zip(*blocks)
+            self.object_features = np.concatenate(features, axis=0)
+            log(" > Extracted %d objects from %d granules", len(self.object_features), len(images))
             
-        if not images:
-            log(f"NOTICE: Local image repository empty.")
+            if all(l is not None for l in labels):
+                return self.object_features, np.concatenate(labels)
+            log("NOTICE: Landslide masks missing for some granules. Training on synthetic objects.")
+        else:
+            log("NOTICE: Local image repository empty.")
 
-        log(f" > Generating synthetic tensors for {SYNTHETIC_BATCH_SIZE} objects...")
+        log(" > Generating synthetic tensors for %d objects...", SYNTHETIC_BATCH_SIZE)
         
-        # Simulation of feature extraction
-        for i in range(0, SYNTHETIC_BATCH_SIZE, 5000):
-            log(f" > Extracted features for batch {i}-{i+5000}...")
-            time.sleep(0.2)
-
-        X_sim = np.random.rand(SYNTHETIC_BATCH_SIZE, 9)
-        y_sim = np.random.choice([0, 1], size=SYNTHETIC_BATCH_SIZE, p=[0.9, 0.1])
-        columns = ["mean_red", "mean_green", "mean_blue", "ndvi_mean", "vari_diff", 
-                   "texture_contrast", "texture_entropy", "shape_convexity", "shape_eccentricity"]
-        return pd.DataFrame(X_sim, columns=columns), y_sim
+        # One BitGenerator pass fills the preallocated row-major buffer in place
+        X = np.empty((SYNTHETIC_BATCH_SIZE, len(FEATURE_COLUMNS)), dtype=np.float32)
+        rng.random(out=X, dtype=np.float32)
+        X *= SYNTHETIC_SCALE
+        X += SYNTHETIC_OFFSET
+        # ~10% positive (landslide) objects
+        y = (rng.random(SYNTHETIC_BATCH_SIZE, dtype=np.float32) < 0.1).astype(np.int8)
+        
+        return X, y
 
-def train_main_model(X, y):
-    """ PHASE 2: Train GeoSlide (Random Forest) """
-    log("-" * 50)
-    log("PHASE 2: TRAINING GEOSLIDE MODEL (OBIA-RF)")
-    log("-" * 50)
+def save_object_features(features, path=None):
+    """ Writes the (N, 9) object feature matrix as a zstd Parquet table, one column per FEATURE_COLUMNS entry. """
+    path = path or FEATURES_PATH
+    if pa is None:
+        log("NOTICE: pyarrow not installed. Skipping feature table export.")
+        return
+    table = pa.Table.from_arrays([pa.array(features[:, i]) for i in range(features.shape[1])], names=FEATURE_COLUMNS)
+    pq.write_table(table, path, compression='zstd')
+    log(" > Feature Table Saved: %s (%d objects)", path, table.num_rows)
+
+def extractor_fingerprint():
+    """
+    Hash of the feature extraction source and settings. Memory only hashes
+    cached_dataset's own code, so this stands in for everything it calls.
+    """
+    code = (read_granule, read_mask, to_reflectance, stretch, split_bands, vari, segment, OBIA_Engine,
+            inspect.getmodule(glcm_features), inspect.getmodule(normalize_bands))
+    settings = (FEATURE_COLUMNS, OBJECTS_PER_IMAGE, GLCM_LEVELS, L2A_DN_THRESHOLD, SLIC_COMPACTNESS,
+                slic_gpu is not None)
+    return joblib.hash(([inspect.getsource(obj) for obj in code], settings))
+
+def dataset_signature():
+    """ extractor_fingerprint() plus (folder, name, size, mtime) of every pre, post and mask granule. """
+    entries = []
+    for folder in ("pre", "post", "mask"):
+        path = os.path.join(DATA_DIR, folder)
+        if not os.path.isdir(path):
+            continue
+        with os.scandir(path) as it:
+            entries.extend((folder, e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in it)
+    return extractor_fingerprint(), sorted(entries)
+
+@memory.cache(ignore=['engine'])
+def cached_dataset(engine, signature):
+    """ Runs build_dataset once per dataset signature. Returns (X, y, object_features). """
+    X, y = engine.build_dataset()
+    return X, y, engine.object_features
+
+@memory.cache
+def fit_main_model(X, y):
+    """ Splits, fits and scores the forest; cached on the contents of X and y. Returns (clf, f1). """
+    # Binary labels travel as int8 alongside the float32 features
+    y = np.asarray(y, dtype=np.int8)
     
-    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+    # 80/20 split by shuffled row index; fixed seed keeps validation F1 reproducible
+    idx = np.random.default_rng(42).permutation(len(X))
+    n_val = int(0.2 * len(X))
+    val_idx, train_idx = idx[:n_val], idx[n_val:]
+    X_train, X_val = X[train_idx], X[val_idx]
+    y_train, y_val = y[train_idx], y[val_idx]
     
-    clf = RandomForestClassifier(n_estimators=200, max_depth=15, class_weight='balanced', n_jobs=-1)
+    # Histogram binning replaces per-split column sorts; threading is OpenMP-internal
+    clf = HistGradientBoostingClassifier(max_iter=200, max_depth=15, class_weight='balanced', early_stopping=True,
+                                         random_state=42)
     
-    log("Fitting Random Forest Ensemble (200 Trees)...")
+    log("Fitting Gradient Boosted Ensemble (up to 200 Trees)...")
     clf.fit(X_train, y_train)
     
     # Metrics
     preds = clf.predict(X_val)
-    f1 = f1_score(y_val, preds)
-    log(f" > GeoSlide Validation F1-Score: {f1:.4f}")
+    return clf, f1_score(y_val, preds)
+
+def train_main_model(X, y):
+    """ PHASE 2: Train GeoSlide (Gradient Boosted Trees) """
+    log("-" * 50)
+    log("PHASE 2: TRAINING GEOSLIDE MODEL (OBIA-GBT)")
+    log("-" * 50)
+    
+    clf, f1 = fit_main_model(X, y)
+    log(" > GeoSlide Validation F1-Score: %.4f", f1)
     
     # Save
     save_path = os.path.join(MODEL_DIR, "rf_obia_v4.joblib")
     if not os.path.exists(MODEL_DIR): os.makedirs(MODEL_DIR)
     
-    joblib.dump(clf, save_path)
-    # Add fake weight to make it 55MB
-    with open(save_path, "ab") as f:
-        f.write(os.urandom(1024 * 1024 * 55))
-        
-    log(f" > Model Artifact Saved: {save_path} (55 MB)")
+    joblib.dump(clf, save_path, compress=MODEL_COMPRESSION)
+    size_kb = os.path.getsize(save_path) / 1024
+    log(" > Model Artifact Saved: %s (%.0f KB)", save_path, size_kb)
+
 
 def train_baseline_model():
     """ PHASE 3: Train Baseline (ResNet-50) - SIMULATED """
@@ -130,15 +343,12 @@ def train_baseline_model():
     
     log("Initializing PyTorch ResNet-50 Architecture...")
     log("Loading ImageNet Pre-trained Weights...")
-    time.sleep(1.0)
-    
 
     epochs = 5
     for epoch in range(epochs):
         loss = 0.8 - (epoch * 0.15)
         acc = 0.55 + (epoch * 0.04)
-        log(f" > Epoch {epoch+1}/{epochs} | Loss: {loss:.4f} | Val_Acc: {acc:.2f}")
-        time.sleep(0.5)
+        log(" > Epoch %d/%d | Loss: %.4f | Val_Acc: %.2f", epoch + 1, epochs, loss, acc)
         
     log(" > Baseline Training Complete. Final Accuracy: 0.72")
     
@@ -146,12 +356,8 @@ def train_baseline_model():
     save_path = os.path.join(MODEL_DIR, "resnet50_baseline.pth")
     
     with open(save_path, "wb") as f:
- 
         f.write(b'\x80\x02\x8a\nl\xfc\x9c\x46\xf9\x20\x6a\xa8\x50\x19')
-     
-        f.write(os.urandom(1024 * 1024 * 95))
-        
-    log(f" > Baseline Artifact Saved: {save_path} (95 MB)")
+    log(" > Baseline Artifact Saved: %s (%d bytes)", save_path, os.path.getsize(save_path))
 
 def main():
     log("="*60)
@@ -162,7 +368,10 @@ def main():
     engine = OBIA_Engine()
     
     # 1. DATA PREP
-    X, y = engine.build_dataset()
+    signature = dataset_signature()
+    X, y, engine.object_features = cached_dataset(engine, signature)
+    if engine.object_features is not None:
+        save_object_features(engine.object_features)
     
     # 2. TRAIN MAIN MODEL (GeoSlide)
     train_main_model(X, y)
@@ -174,4 +383,5 @@ def main():
     log("ALL PIPELINES COMPLETED SUCCESSFULLY.")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%H:%M:%S', stream=sys.stdout)
     main()
\ No newline at end of file
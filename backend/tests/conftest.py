@@ -0,0 +1,16 @@
+import os
+import sys
+import types
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+sys.path.insert(0, BACKEND_DIR)
+
+# preprocessing.py imports torch for to_gpu() only; stub it so machines
+# without the GPU stack can still import the engine and the trainer.
+try:
+    import torch  # noqa: F401
+except ImportError:
+    _torch = types.ModuleType("torch")
+    _torch.Tensor = type("Tensor", (), {})
+    sys.modules["torch"] = _torch
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batch_scheduler import BatchScheduler, InvalidCoordinates
+
+
+class FakeEngine:
+    """ Echoes each tile's coordinates back and records every batch it sees. """
+
+    def __init__(self):
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def run_inference_pipeline_batch(self, lats, lons, dates_pre, dates_post):
+        with self._lock:
+            self.batches.append(list(zip(lats.tolist(), lons.tolist())))
+        return [{"lat": lat, "lon": lon} for lat, lon in zip(lats, lons)]
+
+
+def _predict_all(scheduler, coords):
+    def call(latlon):
+        try:
+            return scheduler.predict(*latlon, None, None)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(coords)) as pool:
+        return list(pool.map(call, coords))
+
+
+def test_bad_coordinate_fails_only_its_own_request():
+    engine = FakeEngine()
+    scheduler = BatchScheduler(engine, max_batch_size=16, batch_timeout=0.2)
+    coords = [(30.1, 79.1), ("north", 79.2), (30.3, "79.3"), (30.4, 79.4)]
+
+    results = _predict_all(scheduler, coords)
+
+    assert isinstance(results[1], InvalidCoordinates)
+    assert results[0] == {"lat": 30.1, "lon": 79.1}
+    assert results[2] == {"lat": 30.3, "lon": 79.3}
+    assert results[3] == {"lat": 30.4, "lon": 79.4}
+    dispatched = [latlon for batch in engine.batches for latlon in batch]
+    assert sorted(dispatched) == [(30.1, 79.1), (30.3, 79.3), (30.4, 79.4)]
+
+
+@pytest.mark.parametrize("lat, lon", [(None, 79.0), ("nan", 79.0), (30.0, "inf"), ([30.0], 79.0)])
+def test_invalid_coordinates_never_reach_the_engine(lat, lon):
+    engine = FakeEngine()
+    scheduler = BatchScheduler(engine)
+
+    with pytest.raises(InvalidCoordinates):
+        scheduler.predict(lat, lon, None, None)
+    assert engine.batches == []
+
+
+def test_concurrent_requests_share_a_batch():
+    engine = FakeEngine()
+    scheduler = BatchScheduler(engine, max_batch_size=4, batch_timeout=1.0)
+
+    results = _predict_all(scheduler, [(30.0 + i, 79.0) for i in range(4)])
+
+    assert [r["lat"] for r in results] == [30.0, 31.0, 32.0, 33.0]
+    assert len(engine.batches) == 1
@@ -0,0 +1,55 @@
+import importlib.util
+import logging
+import os
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "dataset", "post", "rename_files.py")
+
+
+@pytest.fixture
+def renamer(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("rename_files", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "folder_path", str(tmp_path))
+    return module
+
+
+def _touch(folder, *names):
+    for name in names:
+        (folder / name).write_text(name)
+
+
+def test_renames_files_to_their_new_name(renamer, tmp_path):
+    _touch(tmp_path, "image_1.h5", "image_2.h5", "notes.txt")
+
+    assert renamer.rename_images() == 2
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "post_1.h5", "post_2.h5"]
+    assert (tmp_path / "post_1.h5").read_text() == "image_1.h5"
+
+
+def test_existing_target_is_kept_and_logged(renamer, tmp_path, caplog):
+    _touch(tmp_path, "image_1.h5", "post_1.h5")
+
+    with caplog.at_level(logging.WARNING):
+        assert renamer.rename_images() == 0
+
+    assert (tmp_path / "post_1.h5").read_text() == "post_1.h5"
+    assert (tmp_path / "image_1.h5").exists()
+    assert "image_1.h5 -> post_1.h5" in caplog.text
+
+
+def test_duplicate_claim_renames_only_one_source(renamer, tmp_path, caplog):
+    # Both names become post_post.h5
+    _touch(tmp_path, "image_post.h5", "post_image.h5")
+
+    with caplog.at_level(logging.WARNING):
+        assert renamer.rename_images() == 1
+
+    remaining = sorted(os.listdir(tmp_path))
+    assert "post_post.h5" in remaining
+    assert len(remaining) == 2
+    [record] = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert record.getMessage().endswith("another file is renamed to that name")
+    assert (tmp_path / "post_post.h5").read_text() in ("image_post.h5", "post_image.h5")
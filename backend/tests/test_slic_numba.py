@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from slic_numba import slic
+
+
+def _quadrant_image(size=32, bands=4):
+    img = np.zeros((size, size, bands), dtype=np.float32)
+    half = size // 2
+    img[:half, half:] = 1.0
+    img[half:, :half] = 2.0
+    img[half:, half:] = 3.0
+    return img
+
+
+def test_slic_returns_label_map_of_image_shape():
+    labels = slic(_quadrant_image(), n_segments=16, compactness=0.1)
+
+    assert labels.shape == (32, 32)
+    assert labels.dtype == np.int32
+    assert labels.min() >= 0
+
+
+def test_slic_label_count_matches_seed_grid():
+    # 32x32 with 16 segments gives step 8, i.e. a 4x4 grid of seeds
+    labels = slic(_quadrant_image(), n_segments=16, compactness=0.1)
+
+    assert labels.max() < 16
+    assert 1 < len(np.unique(labels)) <= 16
+
+
+def test_slic_superpixels_do_not_cross_spectral_edges():
+    img = _quadrant_image()
+    labels = slic(img, n_segments=16, compactness=0.1)
+
+    for k in np.unique(labels):
+        assert len(np.unique(img[labels == k, 0])) == 1
+
+
+@pytest.mark.parametrize("shape", [(20, 24), (20, 24, 1)])
+def test_slic_accepts_single_band_images(shape):
+    labels = slic(np.zeros(shape, dtype=np.float32), n_segments=4)
+
+    assert labels.shape == (20, 24)
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+from joblib import Memory
+
+import train_model as tm
+
+
+class CountingEngine:
+    """ Stands in for OBIA_Engine and counts how often the dataset is rebuilt. """
+
+    def __init__(self):
+        self.builds = 0
+        self.object_features = None
+
+    def build_dataset(self):
+        self.builds += 1
+        X = np.full((4, len(tm.FEATURE_COLUMNS)), self.builds, dtype=np.float32)
+        self.object_features = X
+        return X, np.zeros(4, dtype=np.int8)
+
+
+@pytest.fixture
+def granules(tmp_path, monkeypatch):
+    for folder, name in (("pre", "tile_pre_1.h5"), ("post", "tile_post_1.h5")):
+        os.makedirs(tmp_path / folder)
+        (tmp_path / folder / name).write_bytes(b"granule")
+    monkeypatch.setattr(tm, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def cached_dataset(tmp_path):
+    return Memory(str(tmp_path / "cache"), verbose=0).cache(tm.cached_dataset.func, ignore=["engine"])
+
+
+def test_unchanged_dataset_hits_the_cache(granules, cached_dataset):
+    engine = CountingEngine()
+
+    cached_dataset(engine, tm.dataset_signature())
+    X, _, _ = cached_dataset(engine, tm.dataset_signature())
+
+    assert engine.builds == 1
+    assert X[0, 0] == 1
+
+
+def test_touching_a_granule_invalidates_the_cache(granules, cached_dataset):
+    engine = CountingEngine()
+    cached_dataset(engine, tm.dataset_signature())
+
+    granule = granules / "post" / "tile_post_1.h5"
+    st = os.stat(granule)
+    os.utime(granule, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    X, _, _ = cached_dataset(engine, tm.dataset_signature())
+
+    assert engine.builds == 2
+    assert X[0, 0] == 2
+
+
+def test_extraction_settings_are_part_of_the_signature(granules, monkeypatch):
+    before = tm.dataset_signature()
+    monkeypatch.setattr(tm, "OBJECTS_PER_IMAGE", tm.OBJECTS_PER_IMAGE + 1)
+
+    assert tm.dataset_signature() != before
@@ -0,0 +1,97 @@
+import os
+
+import h5py
+import numpy as np
+import pytest
+
+import train_model as tm
+
+SIZE = 64
+
+
+def _write_h5(path, array):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with h5py.File(path, "w") as f:
+        f.create_dataset("img", data=array)
+
+
+def _scene(rng, bright):
+    """ A 12-band L2A-style granule (digital numbers) with a bright left half. """
+    img = rng.uniform(800, 1200, (SIZE, SIZE, 12)).astype(np.float32)
+    img[:, : SIZE // 2] += bright
+    return img
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """ One pre/post granule pair whose left half is a mapped landslide. """
+    rng = np.random.default_rng(0)
+    _write_h5(str(tmp_path / "pre" / "tile_pre_1.h5"), _scene(rng, 2000))
+    _write_h5(str(tmp_path / "post" / "tile_post_1.h5"), _scene(rng, 4000))
+    mask = np.zeros((SIZE, SIZE, 1), dtype=np.uint8)
+    mask[:, : SIZE // 2] = 1
+    _write_h5(str(tmp_path / "mask" / "tile_mask_1.h5"), mask)
+
+    monkeypatch.setattr(tm, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(tm, "OBJECTS_PER_IMAGE", 16)
+    return tmp_path
+
+
+def test_l2a_granule_is_put_on_reflectance_scale():
+    raw = np.full((4, 4, 12), 3000.0, dtype=np.float32)
+
+    reflectance = tm.to_reflectance(raw)
+
+    assert reflectance.max() <= 1.0
+    # Pre-scaled products pass through untouched
+    assert tm.to_reflectance(reflectance) is reflectance
+
+
+def test_extracted_features_follow_the_scene(dataset):
+    engine = tm.OBIA_Engine()
+    features, labels = engine.extract_features_from_image(str(dataset / "pre" / "tile_pre_1.h5"))
+
+    assert features.dtype == np.float32
+    assert features.shape[1] == len(tm.FEATURE_COLUMNS)
+    assert len(features) > 1
+    assert np.isfinite(features).all()
+    # Bright (landslide) and dark objects must separate on the band means
+    assert np.ptp(features[:, 0]) > 0.5
+    # Texture is non-degenerate for a noisy scene
+    assert (features[:, 6] > 0).all()
+
+    assert labels.dtype == np.int8
+    assert set(labels.tolist()) == {0, 1}
+    bright = features[:, 0] > 0.5
+    np.testing.assert_array_equal(labels, bright.astype(np.int8))
+
+
+def test_glcm_fallback_matches_compiled_texture(dataset, monkeypatch):
+    path = str(dataset / "pre" / "tile_pre_1.h5")
+    engine = tm.OBIA_Engine()
+    compiled, _ = engine.extract_features_from_image(path)
+
+    monkeypatch.setattr(tm, "HAVE_NUMBA", False)
+    fallback, _ = engine.extract_features_from_image(path)
+
+    np.testing.assert_allclose(fallback[:, 5:7], compiled[:, 5:7], rtol=1e-5)
+
+
+def test_build_dataset_uses_mask_labels(dataset):
+    X, y = tm.OBIA_Engine().build_dataset()
+
+    assert len(X) == len(y) > 1
+    assert 0 < y.sum() < len(y)
+
+
+def test_build_dataset_falls_back_to_synthetic_without_masks(dataset, monkeypatch):
+    os.remove(dataset / "mask" / "tile_mask_1.h5")
+    monkeypatch.setattr(tm, "SYNTHETIC_BATCH_SIZE", 100)
+    engine = tm.OBIA_Engine()
+
+    X, y = engine.build_dataset()
+
+    assert X.shape == (100, len(tm.FEATURE_COLUMNS))
+    assert y.shape == (100,)
+    # The real objects are still kept for the feature table export
+    assert len(engine.object_features) > 1
@@ -1,4 +1,6 @@
 import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # --- SETTINGS ---
 # "." means "current folder" (where this script is saved).
@@ -9,33 +11,55 @@ folder_path = "."
 search_text = "image"
 replace_text = "post"
 
+# Renames run in parallel; os.replace releases the GIL during the syscall
+max_workers = 8
+
+def rename_one(pair):
+    old_file, new_file = pair
+    try:
+        os.replace(old_file, new_file)
+        print(f"✅ Renamed: {os.path.basename(old_file)}  --->  {os.path.basename(new_file)}")
+        return True
+    except OSError as e:
+        print(f"❌ Error renaming {os.path.basename(old_file)}: {e}")
+        return False
+
 def rename_images():
-    count = 0
-    # Loop through all files in the folder
-    for filename in os.listdir(folder_path):
-        
-        # Check if the filename contains the search text (e.g., "image")
-        if search_text in filename:
+    # Collect every (old, new) pair first so renames never race the directory scan
+    pairs = []
+    targets = set()
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            filename = entry.name
+            
+            # Skip files without the search text (e.g., "image")
+            if filename.find(search_text) < 0:
+                continue
             
             # Create the new name
             new_filename = filename.replace(search_text, replace_text)
-            
-            # Get full paths
-            old_file = os.path.join(folder_path, filename)
             new_file = os.path.join(folder_path, new_filename)
             
-            # Rename
-            try:
-                os.rename(old_file, new_file)
-                print(f"✅ Renamed: {filename}  --->  {new_filename}")
-                count += 1
-            except Exception as e:
-                print(f"❌ Error renaming {filename}: {e}")
+            # Never overwrite: skip names that already exist or that another file claims
+            if new_filename in targets:
+                logging.warning("Skipped %s -> %s: another file is renamed to that name", filename, new_filename)
+                continue
+            if os.path.exists(new_file):
+                logging.warning("Skipped %s -> %s: target already exists", filename, new_filename)
+                continue
+            targets.add(new_filename)
+            pairs.append((entry.path, new_file))
+    
+    # Rename (atomic)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        count = sum(ex.map(rename_one, pairs))
 
     if count == 0:
         print("No files found with the name '" + search_text + "'")
     else:
         print(f"\nSuccessfully renamed {count} files!")
+    return count
 
-# Run the function
-rename_images()
\ No newline at end of file
+if __name__ == "__main__":
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+    rename_images()